@@ -1,5 +1,10 @@
+import os
 import numpy as np
-import quaternionic as qc
+from numba import njit, prange
+
+# Use oneDNN CPU kernels (must be set before TensorFlow is imported).
+os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "1")
+
 import tensorflow as tf
 import keras
 from keras.models import Sequential
@@ -14,24 +19,29 @@ from keras.layers import (
 )
 
 
-def set_tf_seed(seed):
+def set_tf_seed(seed, deterministic=False):
     """
-    Set random seeds and enable deterministic ops for Keras/TensorFlow reproducibility.
+    Set random seeds and optionally enable deterministic ops for Keras/TensorFlow reproducibility.
 
     Parameters
     ----------
     seed : int
         Seed used by Keras/TensorFlow random number generators.
+    deterministic : bool, optional
+        If True, also enable deterministic ops so that training is
+        bit-reproducible.
 
     Notes
     -----
     Enabling deterministic ops can reduce training throughput on some systems.
+    The setting is process-wide and stays active once enabled.
     """
     keras.utils.set_random_seed(seed)
-    tf.config.experimental.enable_op_determinism()
+    if deterministic:
+        tf.config.experimental.enable_op_determinism()
 
 
-def get_CNN(X, Y):
+def get_CNN(X, Y, deterministic=False):
     """
     Construct a lightweight CNN used in the fusion model.
 
@@ -44,13 +54,16 @@ def get_CNN(X, Y):
         Input array of shape (N, T, C) used to infer model input shape.
     Y : np.ndarray
         Target array of shape (N, D) used to infer output dimensionality.
+    deterministic : bool, optional
+        If True, enable deterministic ops for reproducible training. Defaults
+        to False, which keeps the faster non-deterministic kernels.
 
     Returns
     -------
     keras.Model
         Uncompiled Keras model (caller is expected to compile/train).
     """
-    set_tf_seed(42)
+    set_tf_seed(42, deterministic=deterministic)
 
     model = Sequential()
     model.add(Input(shape=(X.shape[1], X.shape[2])))
@@ -65,6 +78,196 @@ def get_CNN(X, Y):
     return model
 
 
+def get_xla_predictor(model):
+    """
+    Wrap a trained CNN's forward pass in an XLA-compiled function.
+
+    The input shape (T, C) is fixed per model, so XLA compiles the fused
+    forward pass once per number of samples N and reuses it afterwards.
+
+    Parameters
+    ----------
+    model : keras.Model
+        Trained model returned by `get_CNN`.
+
+    Returns
+    -------
+    callable
+        Function mapping an input array of shape (N, T, C) to predictions
+        of shape (N, D) as a NumPy array.
+    """
+    _, T, C = model.input_shape
+
+    @tf.function(jit_compile=True, input_signature=[tf.TensorSpec((None, T, C), tf.float32)])
+    def predict(x):
+        return model(x, training=False)
+
+    return lambda X: predict(np.asarray(X, dtype=np.float32)).numpy()
+
+
+def get_tflite(model, X, n_calib=200):
+    """
+    Convert a trained CNN into an INT8-quantized TFLite interpreter.
+
+    Weights and activations are quantized to INT8 using samples of X as the
+    representative dataset; the model topology is unchanged. Outputs are
+    dequantized back to float32.
+
+    Parameters
+    ----------
+    model : keras.Model
+        Trained model returned by `get_CNN`.
+    X : np.ndarray
+        Representative input array of shape (N, T, C), e.g. the calibration
+        segment used for training.
+    n_calib : int, optional
+        Number of evenly spaced samples of X used to calibrate activation
+        ranges.
+
+    Returns
+    -------
+    tf.lite.Interpreter
+        Interpreter running the quantized model (see `predict_tflite`).
+    """
+    idx = np.linspace(0, len(X) - 1, min(n_calib, len(X))).astype(int)
+
+    def representative_dataset():
+        for i in idx:
+            yield [np.asarray(X[i : i + 1], dtype=np.float32)]
+
+    run = tf.function(lambda x: model(x, training=False))
+    spec = tf.TensorSpec((None, X.shape[1], X.shape[2]), tf.float32)
+    converter = tf.lite.TFLiteConverter.from_concrete_functions(
+        [run.get_concrete_function(spec)], model
+    )
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+
+    return tf.lite.Interpreter(model_content=converter.convert(), num_threads=os.cpu_count())
+
+
+def predict_tflite(interpreter, X):
+    """
+    Run a quantized CNN from `get_tflite` on a full input sequence.
+
+    Parameters
+    ----------
+    interpreter : tf.lite.Interpreter
+        Interpreter returned by `get_tflite`.
+    X : np.ndarray
+        Input array of shape (N, T, C).
+
+    Returns
+    -------
+    np.ndarray, shape (N, D)
+        Model predictions.
+    """
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+
+    # Quantize inputs with the calibrated scale and zero point.
+    scale, zero_point = inp["quantization"]
+    Xq = np.clip(np.round(np.asarray(X, dtype=np.float32) / scale) + zero_point, -128, 127)
+
+    interpreter.resize_tensor_input(inp["index"], Xq.shape)
+    interpreter.allocate_tensors()
+    interpreter.set_tensor(inp["index"], Xq.astype(np.int8))
+    interpreter.invoke()
+    return interpreter.get_tensor(out["index"])
+
+
+# Fast-math flags for the kernels below, excluding "nnan"/"ninf" so NaN
+# inputs and the NaN checks in the kernels keep well-defined results.
+_FASTMATH = {"contract", "arcp", "afn"}
+
+
+@njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def _qnorm(src, dst):
+    """
+    Write the rows of src, normalized to unit quaternions, into dst.
+
+    Each row is first scaled by its largest absolute component so the norm
+    cannot overflow or underflow. All-zero rows are written as NaN.
+    """
+    for i in prange(src.shape[0]):
+        w, x, y, z = src[i, 0], src[i, 1], src[i, 2], src[i, 3]
+        m = max(abs(w), abs(x), abs(y), abs(z))
+        if m > 0:
+            w, x, y, z = w/m, x/m, y/m, z/m
+            r = np.sqrt(w*w + x*x + y*y + z*z)
+            dst[i, 0], dst[i, 1], dst[i, 2], dst[i, 3] = w/r, x/r, y/r, z/r
+        else:
+            dst[i, 0], dst[i, 1], dst[i, 2], dst[i, 3] = np.nan, np.nan, np.nan, np.nan
+
+
+@njit(inline="always")
+def _qmul(a, b):
+    """Hamilton product of two (w, x, y, z) tuples."""
+    aw, ax, ay, az = a
+    bw, bx, by, bz = b
+    return (
+        aw*bw - ax*bx - ay*by - az*bz,
+        aw*bx + ax*bw + ay*bz - az*by,
+        aw*by - ax*bz + ay*bw + az*bx,
+        aw*bz + ax*by - ay*bx + az*bw,
+    )
+
+
+@njit(inline="always")
+def _qconj(a):
+    """Conjugate of a (w, x, y, z) tuple."""
+    return (a[0], -a[1], -a[2], -a[3])
+
+
+@njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def _yaw_kernel(q_arm, q_tor, q_est, w, z):
+    """
+    Compute the pure-yaw drift correction (w, 0, 0, z) of q_tor * q_est * q_arm^-1.
+
+    Results are written into the preallocated arrays w and z.
+    """
+    for i in prange(q_arm.shape[0]):
+        arm = (q_arm[i, 0], q_arm[i, 1], q_arm[i, 2], q_arm[i, 3])
+        tor = (q_tor[i, 0], q_tor[i, 1], q_tor[i, 2], q_tor[i, 3])
+        est = (q_est[i, 0], q_est[i, 1], q_est[i, 2], q_est[i, 3])
+        qw, qx, qy, qz = _qmul(_qmul(tor, est), _qconj(arm))
+
+        # yaw = atan2(Y, X); (cos(yaw/2), sin(yaw/2)) is the normalized
+        # (r + X, Y), or (|Y|, sign(Y)*(r - X)) to avoid cancellation when X < 0
+        Y = 2*(qx*qy + qw*qz)
+        X = 1 - 2*(qy*qy + qz*qz)
+        r = np.sqrt(X*X + Y*Y)
+        if X >= 0:
+            hw, hz = r + X, Y
+        else:
+            hw, hz = abs(Y), np.copysign(r - X, Y)
+        n = np.sqrt(hw*hw + hz*hz)
+        if X == 0 and Y == 0:
+            # atan2(0, 0) == 0; the only case with n == 0. NaN flows through.
+            w[i], z[i] = 1.0, 0.0
+        else:
+            w[i], z[i] = hw/n, hz/n
+
+
+@njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def _fis_kernel(q_arm, q_tor, w_corr, z_corr, out):
+    """
+    Apply the yaw correction as conj(q_tor) * (w, 0, 0, z) * q_arm.
+
+    Results are written into the preallocated (N, 4) array out.
+    """
+    for i in prange(q_arm.shape[0]):
+        arm = (q_arm[i, 0], q_arm[i, 1], q_arm[i, 2], q_arm[i, 3])
+        tw, tx, ty, tz = _qconj((q_tor[i, 0], q_tor[i, 1], q_tor[i, 2], q_tor[i, 3]))
+        cw, cz = w_corr[i], z_corr[i]
+
+        # conj(q_tor) * q_corr, expanded since q_corr has x = y = 0
+        p = (tw*cw - tz*cz, tx*cw + ty*cz, ty*cw - tx*cz, tw*cz + tz*cw)
+        out[i, 0], out[i, 1], out[i, 2], out[i, 3] = _qmul(p, arm)
+
+
 def fusion_alg(quat_arm, quat_tor, quat_est, win=0):
     """
     Apply yaw-drift correction to estimate shoulder orientation (FIS).
@@ -89,36 +292,51 @@ def fusion_alg(quat_arm, quat_tor, quat_est, win=0):
 
     Returns
     -------
-    quat_out : quaternionic.array, shape (N,)
+    quat_out : np.ndarray, shape (N, 4)
         Corrected shoulder orientation quaternion sequence.
-    """
 
-    # Convert from float array to quaternions array
-    quat_arm = qc.array(np.ascontiguousarray(quat_arm, dtype=np.float64)).normalized
-    quat_tor = qc.array(np.ascontiguousarray(quat_tor, dtype=np.float64)).normalized
-    quat_est = qc.array(np.ascontiguousarray(quat_est, dtype=np.float64)).normalized
+    Raises
+    ------
+    ValueError
+        If the inputs are not all of shape (N, 4) with the same N.
+    """
 
-    # Find correction quaternions
-    q = quat_tor * quat_est * np.conj(quat_arm)
+    # The kernels below do no bounds checking, so validate shapes up front
+    names = ("quat_arm", "quat_tor", "quat_est")
+    quats = [np.asarray(q) for q in (quat_arm, quat_tor, quat_est)]
+    for name, q in zip(names, quats):
+        if q.shape != (len(quats[0]), 4):
+            raise ValueError(f"{name} must have shape ({len(quats[0])}, 4), got {q.shape}")
 
-    # Extract yaw
-    yaw = np.arctan2(2*(q.x*q.y + q.w*q.z), 1 - 2*(q.y*q.y + q.z*q.z))
+    # Normalize inputs to unit quaternions in one float32 buffer (float32 is
+    # ample for orientations)
+    quat = np.empty((3, len(quats[0]), 4), dtype=np.float32)
+    for src, dst in zip(quats, quat):
+        _qnorm(src, dst)
+    quat_arm, quat_tor, quat_est = quat
 
-    # Convert back to quaternions (pure yaw)
-    w, z = np.cos(yaw/2.0), np.sin(yaw/2.0)
-    quat_corr = np.column_stack([w, np.zeros_like(w), np.zeros_like(w), z])
-    quat_corr_sm = quat_corr.copy()
+    # Find correction quaternions and extract yaw as pure-yaw (w, 0, 0, z)
+    w, z = np.empty(len(quat_arm), dtype=np.float32), np.empty(len(quat_arm), dtype=np.float32)
+    _yaw_kernel(quat_arm, quat_tor, quat_est, w, z)
 
-    # Fast smoothing via rolling sum of outer products
+    # Fast smoothing via rolling sum of outer products, written back into
+    # (w, z). Only (w, z) are nonzero, so each window matrix reduces to
+    # [[a, b], [b, c]] and its dominant eigenvector has a closed form.
+    # Running sums are kept in float64 to avoid cancellation in the
+    # windowed differences.
     if win and win > 0:
-        outers = np.einsum('ni,nj->nij', quat_corr, quat_corr)
-        prefix = np.cumsum(outers, axis=0)
+        S = np.cumsum(np.stack((w*w, w*z, z*z)), axis=1, dtype=np.float64)
+        S[:, win + 1:] -= S[:, :-win - 1]
+        a, b, c = S
 
-        for i in range(len(quat_corr)):
-            M = prefix[i] - (prefix[i - win - 1] if i - win - 1 >= 0 else 0)
-            _, V = np.linalg.eigh(M)
-            quat_corr_sm[i] = V[:, -1] if V[0, -1] > 0 else -V[:, -1]
+        lam = (a + c)/2.0 + np.hypot((a - c)/2.0, b)
+        vx, vy = np.where(a >= c, lam - c, b), np.where(a >= c, b, lam - a)
+        n = np.hypot(vx, vy)
+        vx, n = np.where(n > 0, vx, 1.0), np.where(n > 0, n, 1.0)
+        s = np.where(vx > 0, 1.0, -1.0) / n
+        w[:], z[:] = vx*s, vy*s
 
     # Apply correction
-    quat_out = np.conj(quat_tor) * qc.array(quat_corr_sm).normalized * quat_arm
+    quat_out = np.empty_like(quat_arm)
+    _fis_kernel(quat_arm, quat_tor, w, z, quat_out)
     return quat_out
@@ -1,5 +1,4 @@
 import numpy as np
-import quaternionic as qc
 import matplotlib.pyplot as plt
 
 
@@ -19,7 +18,9 @@ def rms(err):
     float
         Root-mean-square error.
     """
-    return np.sqrt(np.nanmean(err ** 2))
+    err = np.asarray(err)
+    err = err[~np.isnan(err)]
+    return np.sqrt(np.dot(err, err) / err.size)
 
 
 def get_err(q1, q2):
@@ -43,12 +44,18 @@ def get_err(q1, q2):
         Overall orientation error in degrees at each time frame.
     """
     
-    q1 = np.ascontiguousarray(np.asarray(q1, dtype=np.float64))
-    q2 = np.ascontiguousarray(np.asarray(q2, dtype=np.float64))
+    q1 = np.ascontiguousarray(np.asarray(q1, dtype=np.float32))
+    q2 = np.ascontiguousarray(np.asarray(q2, dtype=np.float32))
 
-    q1 = qc.array(q1).normalized
-    q2 = qc.array(q2).normalized
-    return np.degrees(qc.distance.rotation.intrinsic(q1, q2))
+    q1 = q1 / np.linalg.norm(q1, axis=1, keepdims=True)
+    q2 = q2 / np.linalg.norm(q2, axis=1, keepdims=True)
+
+    # Rotation angle between unit quaternions, 2*arccos(|q1 . q2|), evaluated
+    # as 4*atan2(|q1 - q2|, |q1 + q2|) after aligning signs, which stays
+    # accurate for small angles in float32
+    q2 = q2 * np.where(np.einsum('ij,ij->i', q1, q2) < 0, -1, 1).astype(np.float32)[:, None]
+    ang = np.arctan2(np.linalg.norm(q1 - q2, axis=1), np.linalg.norm(q1 + q2, axis=1))
+    return np.degrees(4.0*ang)
 
 
 def get_all_err(t, sig1, sig2, OMC_idx, tag=""):
@@ -81,14 +88,29 @@ def get_all_err(t, sig1, sig2, OMC_idx, tag=""):
         trial segments.
     """
 
-    # calculate & print errors
+    # calculate errors for all trials in one batched pass
+    # with no trials, err_full stays all-NaN rather than raising
+    parts = [np.arange(i0, iN) for i0, iN in OMC_idx]
+    idx = np.concatenate(parts) if parts else np.empty(0, dtype=int)
+    err = get_err(np.asarray(sig1)[idx], np.asarray(sig2)[idx])
+    err_full = np.full((sig1.shape[0],), np.nan)
+    err_full[idx] = err
+
+    # per-trial RMSE from running sums of squared errors over the flat array,
+    # ignoring NaNs as `rms` does
+    valid = ~np.isnan(err)
+    lens = np.array([iN - i0 for i0, iN in OMC_idx], dtype=int)
+    ends = np.cumsum(lens)
+    starts = ends - lens
+    sq = np.concatenate(([0.0], np.cumsum(np.where(valid, err*err, 0.0), dtype=np.float64)))
+    cnt = np.concatenate(([0], np.cumsum(valid)))
+    rmse = np.sqrt((sq[ends] - sq[starts]) / (cnt[ends] - cnt[starts]))
+
+    # print errors
     print(f"{tag}")
     print("  RMSE for each trial:", end=" ")
-    err_full = np.full((sig1.shape[0],), np.nan)
-    for i0, iN in OMC_idx:
-        err = get_err(sig1[i0:iN,:], sig2[i0:iN,:])
-        err_full[i0:iN] = err
-        print(f"{rms(err):.1f}\N{DEGREE SIGN}", end=", ")
+    for r in rmse:
+        print(f"{r:.1f}\N{DEGREE SIGN}", end=", ")
     print(f"\n  Overall RMSE: {rms(err_full):.1f}\N{DEGREE SIGN}")
     
     # plot errors
@@ -1,8 +1,7 @@
+import shutil
 from pathlib import Path
 import numpy as np
-import pandas as pd
-from numpy.lib.stride_tricks import sliding_window_view
-from sklearn.preprocessing import MinMaxScaler
+import pyarrow.csv as pac
 
 
 def get_OMC_idx(sync):
@@ -23,13 +22,11 @@ def get_OMC_idx(sync):
     list of tuple
         List of (start_idx, end_idx) pairs, where end_idx is exclusive.
     """
-    diff = np.diff(sync)
-    srt_idx, end_idx = np.where(diff == 1)[0] + 1, np.where(diff == -1)[0]
-    if sync[0] == 1:
-        srt_idx = np.insert(srt_idx, 0, 0)
-    if sync[-1] == 1:
-        end_idx = np.append(end_idx, len(sync) - 1)
-    return list(zip(srt_idx, end_idx + 1))
+    # Zero-pad both ends so trials touching the boundaries still produce edges.
+    diff = np.diff(np.asarray(sync, dtype=np.int8), prepend=0, append=0)
+    edges = np.flatnonzero(diff)
+    signs = diff[edges]
+    return list(zip(edges[signs == 1], edges[signs == -1]))
 
 
 def prc_quat(quat):
@@ -50,9 +47,8 @@ def prc_quat(quat):
     np.ndarray, shape (N, 4)
         Quaternions with w >= 0.
     """
-    quat = np.array(quat)
-    quat[quat[:, 0] < 0, :] = -quat[quat[:, 0] < 0, :]
-    return quat
+    quat = np.asarray(quat, dtype=np.float64)
+    return quat * np.where(quat[:, 0:1] < 0.0, -1.0, 1.0)
 
 
 def read_csv(filename):
@@ -84,7 +80,8 @@ def read_csv(filename):
         - IMU, IMU_arm, IMU_tor, OMC, OMC_arm, OMC_tor: np.ndarray, shape (N, 4)
         - OMC_idx: list of (start, end) index pairs (end exclusive)
     """
-    data = pd.read_csv(filename, header=0).to_numpy()
+    table = pac.read_csv(filename, read_options=pac.ReadOptions(use_threads=True))
+    data = np.column_stack([col.to_numpy() for col in table.columns])
     time = np.array(data[:, 0])
     SS = np.array(data[:, 1:9])
     OMC_idx = get_OMC_idx(data[:, -1])
@@ -107,8 +104,9 @@ def prc_data(data):
     Steps:
     1) Fit MinMax normalization on SS using the first detected trial segment,
        then apply the transform to the full SS sequence.
-    2) Reshape SS to (N, C, 1) using a length-1 sliding window, matching the
-       expected input format for downstream models.
+    2) Cast SS to float32 and reshape it to (N, 1, C), i.e. one length-1
+       window per sample, matching the expected input format for
+       downstream models.
     3) Clamp trial indices to valid bounds.
 
     Parameters
@@ -120,19 +118,78 @@ def prc_data(data):
     -------
     tuple
         Preprocessed data tuple with the same structure as the input, except:
-        - SS is normalized and reshaped to (N, 8, 1)
+        - SS is normalized, cast to float32 and reshaped to (N, 1, 8)
         - OMC_idx is clamped to [0, len(t)]
     """
     t, SS, IMU, IMU_arm, IMU_tor, OMC, OMC_arm, OMC_tor, OMC_idx = data
 
     # Normalize SS using the first trial segment as calibration.
-    scaler = MinMaxScaler().fit(SS[OMC_idx[0][0] : OMC_idx[0][1], :])
-    SS = scaler.transform(SS)
+    cal = SS[OMC_idx[0][0] : OMC_idx[0][1], :]
+    mn = np.nanmin(cal, axis=0)
+    rng = np.nanmax(cal, axis=0) - mn
+    rng[rng == 0] = 1.0
+    SS = (SS - mn) * (1.0 / rng)
 
-    # Reshape SS to (N, C, 1).
-    SS = np.transpose(sliding_window_view(SS, 1, 0), (0, 2, 1))
+    # Reshape SS to (N, 1, C).
+    SS = np.ascontiguousarray(SS, dtype=np.float32)[:, None, :]
 
     # Clamp OMC sync ranges to valid array bounds.
     OMC_idx = [(max(0, x), min(max(0, y), len(t))) for (x, y) in OMC_idx]
 
     return t, SS, IMU, IMU_arm, IMU_tor, OMC, OMC_arm, OMC_tor, OMC_idx
+
+
+# Bump whenever the output of `prc_data` changes to invalidate cached data.
+_CACHE_VERSION = "1"
+
+
+def load_participant(filename):
+    """
+    Load and preprocess a participant CSV, caching the result on disk.
+
+    On first use the CSV is parsed with `read_csv`, preprocessed with
+    `prc_data`, and each output array is saved as a .npy file in a
+    ``<name>.cache`` directory next to the CSV. Subsequent calls memory-map
+    the cached arrays instead of reparsing the CSV. The cache is rebuilt
+    whenever the CSV is newer than it, or it was written by an older cache
+    format (see `_CACHE_VERSION`) or left incomplete by an interrupted save.
+
+    Parameters
+    ----------
+    filename : str or pathlib.Path
+        Path to the CSV file.
+
+    Returns
+    -------
+    tuple
+        Same structure as the output of `prc_data`. Arrays loaded from the
+        cache are read-only memory maps.
+    """
+    filename = Path(filename)
+    cache = filename.with_suffix(".cache")
+    names = ("t", "SS", "IMU", "IMU_arm", "IMU_tor", "OMC", "OMC_arm", "OMC_tor", "OMC_idx")
+    marker = cache / "version.txt"
+
+    # Trust the cache only if it was fully written by the current cache format
+    # and is newer than the CSV.
+    if (
+        marker.exists()
+        and marker.read_text() == _CACHE_VERSION
+        and marker.stat().st_mtime >= filename.stat().st_mtime
+    ):
+        data = [np.load(cache / f"{name}.npy", mmap_mode="r") for name in names]
+        data[-1] = [tuple(idx) for idx in data[-1].tolist()]
+        return tuple(data)
+
+    # Write into a temporary directory and move it into place only once every
+    # array (and finally the version marker) has been saved.
+    data = prc_data(read_csv(filename))
+    tmp = cache.with_suffix(".cache.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    for name, x in zip(names, data):
+        np.save(tmp / f"{name}.npy", np.asarray(x))
+    (tmp / marker.name).write_text(_CACHE_VERSION)
+    shutil.rmtree(cache, ignore_errors=True)
+    tmp.rename(cache)
+    return data